@@ -2,6 +2,7 @@
 #include <arpa/inet.h>
 #include <assert.h>
 #include <fuse.h>
+#include <sys/un.h>
 #include <unistd.h>
 #include <thread>
 #include <vector>
@@ -22,7 +23,7 @@ MyFSOptions::MyFSOptions()
         ("m,mount", "Mount path", cxxopts::value<std::string>())
         ("p,port", "Port number",cxxopts::value<int>())
         ("c,client", "Run as client")
-        ("servers", "Comma-separated list of server addresses ip:port", cxxopts::value<std::vector<std::string>>())
+        ("servers", "Comma-separated list of server addresses ip:port or unix socket paths", cxxopts::value<std::vector<std::string>>())
         ("r,root", "Root directory", cxxopts::value<std::string>())
         ("l,log", "Log file", cxxopts::value<std::string>())
         ("h,help", "Print usage");
@@ -667,6 +668,31 @@ std::vector<int> connect_servers(std::vector<std::string> &server_addresses)
     server_fds.reserve(server_addresses.size());
     for (const auto &address : server_addresses)
     {
+        if (!address.empty() && address[0] == '/')
+        {
+            // Filesystem path: UNIX-domain socket, skips the TCP stack for
+            // servers on the same host
+            int sd = socket(AF_UNIX, SOCK_STREAM, 0);
+            if (sd < 0) throw std::runtime_error("Socket creation failed");
+
+            struct sockaddr_un server_addr;
+            memset(&server_addr, 0, sizeof(server_addr));
+            server_addr.sun_family = AF_UNIX;
+            strncpy(server_addr.sun_path, address.c_str(),
+                    sizeof(server_addr.sun_path) - 1);
+
+            if (connect(sd, (struct sockaddr *)&server_addr,
+                        sizeof(server_addr)) < 0)
+            {
+                close(sd);
+                throw std::runtime_error("Connection to server " + address +
+                                         " failed");
+            }
+
+            server_fds.push_back(sd);
+            continue;
+        }
+
         size_t colon_pos = address.find(':');
         if (colon_pos == std::string::npos)
             throw std::runtime_error("Invalid server address: " + address);
@@ -1,15 +1,26 @@
 import enum
 from dataclasses import dataclass
+import os
 import struct
 from pathlib import Path
 
 EXE_PATH = Path("./build/bin/myfs")
 TEST_DIR = Path("/home/vscode/tests/")
-CHECK_SIZE = 4096
+CHECK_SIZE = 1 << 20
 CHUNK_SIZE = 1048576
 
 
-class MessageType(enum.Enum):
+def make_random_file(path: Path, size: int) -> None:
+    """Fill path with size random bytes from the kernel CSPRNG"""
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining > 0:
+            n = min(remaining, 4 * 1024 * 1024)
+            f.write(os.urandom(n))
+            remaining -= n
+
+
+class MessageType(enum.IntEnum):
     MSG_READ = 0
     MSG_WRITE_PATH = 1
     MSG_WRITE = 2
@@ -22,12 +33,14 @@ class MessageHeader:
     length: int
 
     FORMAT = "IQ"  # I: unsigned int (4 bytes), Q: unsigned long long (8 bytes)
-    SIZE = struct.calcsize(FORMAT)
+    STRUCT = struct.Struct(FORMAT)  # compiled once, not re-parsed per call
+    SIZE = STRUCT.size
 
     def pack(self) -> bytes:
-        return struct.pack(self.FORMAT, self.type.value, self.length)
+        # IntEnum packs as a plain int, no .value lookup needed
+        return self.STRUCT.pack(self.type, self.length)
 
     @classmethod
     def unpack(cls, data: bytes) -> "MessageHeader":
-        type, length = struct.unpack(cls.FORMAT, data)
+        type, length = cls.STRUCT.unpack(data)
         return cls(MessageType(type), length)